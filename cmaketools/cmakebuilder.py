@@ -1,6 +1,9 @@
 import os
+import warnings
 import re
+import hashlib
 from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
 from setuptools import Extension
 from pathlib import Path as _Path, PurePath as _PurePath
 from distutils import sysconfig
@@ -8,6 +11,9 @@ from distutils import sysconfig
 from . import cmakeutil
 from . import gitutil
 
+# file in the build directory recording the last successful configure command
+_CONFIG_HASH_FILE = ".cmaketools_config_hash"
+
 
 class CMakeBuilder:
     """
@@ -54,6 +60,8 @@ class CMakeBuilder:
     --------------
     get_generators(as_list=False)
         Get available CMake generators
+    show_generators()
+        Print available CMake generators
     get_generator_names()
         Get names of available CMake generators
 
@@ -107,6 +115,12 @@ class CMakeBuilder:
 
         return cmakeutil.get_generators(CMakeBuilder.path, as_list)
 
+    @staticmethod
+    def show_generators():
+        """print available CMake generators"""
+
+        cmakeutil.show_generators(CMakeBuilder.path)
+
     @staticmethod
     def get_generator_names():
         """get names of available CMake generators
@@ -185,6 +199,7 @@ class CMakeBuilder:
         self.dist_dir = "dist"
 
         self._init_config = None
+        self._need_msvc = False
         self._built = False
         self._installed = dict(PY=False, EXT=False)
 
@@ -246,8 +261,9 @@ class CMakeBuilder:
         config=None,
         parallel=None,
         configure_opts=[],
+        force=False,
     ):
-        """configure CMake project"""
+        """configure CMake project (force=True to run cmake even if unchanged)"""
 
         # if skip_configure
         if self.skip_configure:
@@ -297,7 +313,6 @@ class CMakeBuilder:
             self.test_submodules if os.path.isdir(self.test_dir) else [],
         )
 
-        print("\n[cmake] configuring CMake project...\n")
         args = configure_opts
         kwargs = dict(build_type=config, cmakePath=self.path,)
 
@@ -317,11 +332,31 @@ class CMakeBuilder:
         if platform:
             set_option("-A", platform)
 
-        # run cmake configure
-        cmakeutil.configure(".", build_dir, *args, **kwargs)
+        # run cmake configure unless this exact configuration is already in place.
+        # Listfile edits need no check here: `cmake --build` regenerates the
+        # buildsystem by itself whenever a CMakeLists.txt changes.
+        config_hash = _config_hash(build_dir, args, kwargs)
+        hash_file = os.path.join(build_dir, _CONFIG_HASH_FILE)
+        if (
+            not force
+            and cmakeutil.configured(build_dir)
+            and _read_config_hash(hash_file) == config_hash
+        ):
+            print("\n[cmake] CMake project already configured, skipping configure\n")
+        else:
+            print("\n[cmake] configuring CMake project...\n")
+            # drop the old record first: a failed run may leave a cache that no
+            # longer matches it
+            try:
+                os.remove(hash_file)
+            except FileNotFoundError:
+                pass
+            cmakeutil.configure(".", build_dir, *args, **kwargs)
+            _write_config_hash(hash_file, config_hash)
 
         # store the build directory for later use
         self.build_dir = build_dir
+        self._need_msvc = kwargs.get("need_msvc", False)
 
     def run(
         self, prefix, pkg_version=None, component=None, build_opts=[], install_opts=[],
@@ -347,6 +382,7 @@ class CMakeBuilder:
                 build_type=self.config,
                 cmakePath=self.path,
                 env=env,
+                need_msvc=self._need_msvc,
             )
             self._built = True
 
@@ -365,6 +401,7 @@ class CMakeBuilder:
                 component=component,
                 build_type=self.config,
                 cmakePath=self.path,
+                need_msvc=self._need_msvc,
             )
 
             if component:
@@ -382,19 +419,27 @@ class CMakeBuilder:
 
         # glob all the files in dist_dir then filter out py & ext files
         root = _Path(prefix)
-        excludes = [".py", sysconfig.get_config_var("EXT_SUFFIX")]
+        excludes = (".py", sysconfig.get_config_var("EXT_SUFFIX"))
         files = [
-            f
-            for f in root.rglob("**/*")
-            if f.is_file() and not any(f.name.endswith(e) for e in excludes)
+            f for f in root.rglob("**/*") if f.is_file() and not f.name.endswith(excludes)
         ]
 
+        # parent package directory of each directory, memoized as files share dirs
+        pkg_dirs = {}
+
+        def find_pkg_dir(dir):
+            if dir not in pkg_dirs:
+                pkg_dirs[dir] = next(
+                    (d for d in (dir, *dir.parents) if (d / "__init__.py").is_file()),
+                    None,
+                )
+            return pkg_dirs[dir]
+
         # find the parent package of each file and add to the package_data
         package_data = {}
         for f in files:
-            try:
-                pkg_dir = next(d for d in f.parents if (d / "__init__.py").is_file())
-            except:
+            pkg_dir = find_pkg_dir(f.parent)
+            if pkg_dir is None:
                 continue
             pkg_name = _dir_to_pkg(pkg_dir.relative_to(root).as_posix())
             pkg_path = f.relative_to(pkg_dir).as_posix()
@@ -429,9 +474,7 @@ class CMakeBuilder:
 
         # scan src_dir for __init__.py
         root = _Path(self.src_dir)
-        reg_paths = set(
-            [d.parent.relative_to(root) for d in root.rglob("**/__init__.py")]
-        )
+        reg_paths = {d.parent.relative_to(root) for d in root.rglob("**/__init__.py")}
 
         # convert path to str
         pkg_dirs = [path.as_posix() for path in reg_paths]
@@ -468,23 +511,59 @@ class CMakeBuilder:
         )
 
     def _find_ext_modules_from_hint(self):
-        def find_hint(file, hint):
+        # hint is searched (unanchored) in each CMakeLists.txt; a leading ".*"
+        # adds nothing but forces the regex engine to rescan the whole text
+        if self.ext_module_hint.startswith(".*"):
+            warnings.warn(
+                f'Leading ".*" of ext_module_hint "{self.ext_module_hint}" is '
+                "redundant and slows down the search"
+            )
+        hint = re.compile(self.ext_module_hint)
+
+        def find_hint(file):
+            # search the decoded text so the hint keeps str regex (Unicode) semantics
             with open(file) as f:
-                txt = f.read()
-            return re.search(hint, txt)
+                return bool(hint.search(f.read()))
 
+        # reading the files is I/O bound: fan it out, map() keeps the order
         root = _Path(self.src_dir)
-        matched_dirs = [
-            file.parent.relative_to(root).as_posix()
-            for file in root.rglob("**/CMakeLists.txt")
-            if find_hint(file, self.ext_module_hint)
-        ]
+        files = list(root.rglob("**/CMakeLists.txt"))
+        with ThreadPoolExecutor() as executor:
+            found = executor.map(find_hint, files)
+            matched_dirs = [
+                file.parent.relative_to(root).as_posix()
+                for file, match in zip(files, found)
+                if match
+            ]
         return _create_extensions(matched_dirs)
 
 
+def _config_hash(build_dir, args, kwargs):
+    """hash of the cmake configure command line"""
+    cmd = [os.path.abspath(build_dir), *args, *map(str, sorted(kwargs.items()))]
+    return hashlib.blake2b("\0".join(cmd).encode()).hexdigest()
+
+
+def _read_config_hash(file):
+    """hash recorded by the last successful configure, None if absent"""
+    try:
+        with open(file) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_config_hash(file, config_hash):
+    """record the configure hash atomically (no partial file if interrupted)"""
+    tmp = file + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(config_hash)
+    os.replace(tmp, file)
+
+
 def _create_extensions(dirs):
     return [Extension(_dir_to_pkg(mod), []) for mod in dirs]
 
 
 def _dir_to_pkg(pkg_dir):
-    return "" if pkg_dir == "." else re.sub(r"/", ".", pkg_dir)
+    return "" if pkg_dir == "." else pkg_dir.replace("/", ".")
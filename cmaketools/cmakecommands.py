@@ -10,11 +10,82 @@ from setuptools.command.build_ext import build_ext as _build_ext_orig
 from setuptools.command.build_py import build_py as _build_py_orig
 from setuptools.command.sdist import sdist as _sdist_orig
 from distutils.command.install_data import install_data as _install_data_orig
-from wheel import bdist_wheel as _bdist_wheel_orig
 
 from .cmakebuilder import CMakeBuilder
 from . import cmakeutil
 
+# --define entry: <var>[:<type>]=<value>, entries separated by os.pathsep
+_DEFINE_RE = re.compile(
+    r"([A-Za-z0-9_./\-+]+)(?:\:([A-Z]+))?=([^" + os.pathsep + r"]+)"
+)
+
+# build_ext options passed to cmake configure in short form: (attr, flag)
+_CONFIGURE_SHORT_OPTS = (
+    ("cache", "-C",),
+    ("undef", "-U",),
+)
+
+# build_ext options passed as-is to cmake configure, build, and install
+_CONFIGURE_OPT_ATTRS = (
+    "Wno_dev",
+    "Wdev",
+    "Werror",
+    "Wno_error",
+    "Wdeprecated",
+    "Wno_deprecated",
+    "log_level",
+    "log_context",
+    "debug_trycompile",
+    "debug_output",
+    "debug_find",
+    "trace",
+    "trace_expand",
+    "trace_format",
+    "trace_source",
+    "trace_redirect",
+    "warn_uninitialized",
+    "warn_unused_vars",
+    "no_warn_unused_cli",
+)
+_BUILD_OPT_ATTRS = ("clean_first", "verbose")
+_INSTALL_OPT_ATTRS = ("strip", "verbose")
+
+
+def _flag_table(attrs):
+    """Pair each option attribute with its cmake flag, e.g. log_level -> --log-level
+    (warning options are single-dashed: Wno_dev -> -Wno-dev)"""
+    return tuple(
+        (attr, ("-" if attr.startswith("W") else "--") + attr.replace("_", "-"))
+        for attr in attrs
+    )
+
+
+# every build_ext attribute holding a CMake option
+_CMAKE_OPT_ATTRS = tuple(
+    dict.fromkeys(
+        (
+            "cmake_path",
+            "define",
+            *(attr for attr, _ in _CONFIGURE_SHORT_OPTS),
+            "generator",
+            "toolset",
+            "platform",
+            *_CONFIGURE_OPT_ATTRS,
+            "check_system_vars",
+            "parallel",
+            "config",
+            *_BUILD_OPT_ATTRS,
+            *_INSTALL_OPT_ATTRS,
+        )
+    )
+)
+
+_CMAKE_OPT_DEFAULTS = dict.fromkeys(_CMAKE_OPT_ATTRS)
+
+_CONFIGURE_OPT_FLAGS = _flag_table(_CONFIGURE_OPT_ATTRS)
+_BUILD_OPT_FLAGS = _flag_table(_BUILD_OPT_ATTRS)
+_INSTALL_OPT_FLAGS = _flag_table(_INSTALL_OPT_ATTRS)
+
 
 class manifest_maker(_manifest_maker_orig):
     def _add_defaults_python(self):
@@ -51,7 +122,6 @@ def set_package_dir(dist, other_command):
 
 class _egg_info(_egg_info_orig):
     def __init__(self, cmake, dist):
-        print("egg_info (cmake)")
         _egg_info_orig.__init__(self, dist)
         # self.cmake = cmake
 
@@ -112,8 +182,6 @@ class _build_py(_build_py_orig):
         _build_py_orig.run(self)
 
     def _get_data_files(self):
-        print("build_py::_get_data_files (cmake)\n")
-
         # gather package_data from cmake builder
         # - if data exists, egg_info command must run again to update source file list
         if not self.package_data and self.cmake.has_package_data:
@@ -255,7 +323,7 @@ class _build_ext(_build_ext_orig):
         ("strip", None, "Strip before installing."),
     ]
 
-    boolean_options = [
+    boolean_options = (
         "inplace",
         "debug",
         "force",
@@ -276,14 +344,14 @@ class _build_ext(_build_ext_orig):
         "clean-first",
         "strip",
         "verbose",
-    ]
+    )
 
     help_options = [
         (
             "help-generator",
             None,
-            "list available compilers",
-            CMakeBuilder.get_generators,
+            "list available CMake generators",
+            CMakeBuilder.show_generators,
         )
     ]
 
@@ -305,38 +373,7 @@ class _build_ext(_build_ext_orig):
         self.build_lib = None
         self.dist_dir = None
         self.inplace = None
-        self.define = None
-        self.cmake_path = None
-        self.build_lib = None
-        self.cache = None
-        self.undef = None
-        self.generator = None
-        self.toolset = None
-        self.platform = None
-        self.Wno_dev = None
-        self.Wdev = None
-        self.Werror = None
-        self.Wno_error = None
-        self.Wdeprecated = None
-        self.Wno_deprecated = None
-        self.log_level = None
-        self.log_context = None
-        self.debug_trycompile = None
-        self.debug_output = None
-        self.debug_find = None
-        self.trace = None
-        self.trace_expand = None
-        self.trace_format = None
-        self.trace_source = None
-        self.trace_redirect = None
-        self.warn_uninitialized = None
-        self.warn_unused_vars = None
-        self.no_warn_unused_cli = None
-        self.check_system_vars = None
-        self.parallel = None
-        self.config = None
-        self.clean_first = None
-        self.strip = None
+        vars(self).update(_CMAKE_OPT_DEFAULTS)
 
         self.package = None
         self.extensions = None
@@ -392,62 +429,33 @@ class _build_ext(_build_ext_orig):
 
         configure_opts = []
         if self.define:
-            for d in re.finditer(
-                r"([A-Za-z0-9_./\-+]+)(?:\:([A-Z]+))?=([^" + os.pathsep + r"]+)",
-                self.define,
-            ):
-                val = f'"{d[3]}"' if re.search(r"\s", d[3]) else d[3]
+            for d in _DEFINE_RE.finditer(self.define):
+                val = f'"{d[3]}"' if any(c.isspace() for c in d[3]) else d[3]
                 configure_opts.append(
                     f"-D{d[1]}:{d[2]}={val}" if d[2] else f"-D{d[1]}={val}"
                 )
 
         # some CMake options are in short form
-        for opt in (
-            ("cache", "C",),
-            ("undef", "U",),
-        ):
-            val = getattr(self, opt[0])
+        for attr, flag in _CONFIGURE_SHORT_OPTS:
+            val = getattr(self, attr)
             if val:
-                configure_opts.append(f"-{opt[1]}")
-                configure_opts.append(val)
+                configure_opts.extend((flag, val))
 
         def set_args(args, opts):
-            for attr in opts:
+            for attr, flag in opts:
                 val = getattr(self, attr)
-                opt = re.sub("_", "-", attr)
                 if val == 1:
-                    args.append(f"--{opt}")
+                    args.append(flag)
                 elif val:
-                    args.append(f"--{opt}={val}")
+                    args.append(f"{flag}={val}")
             return args
 
-        set_args(
-            configure_opts,
-            (
-                "Wno_dev",
-                "Wdev",
-                "Werror",
-                "Wno_error",
-                "Wdeprecated",
-                "Wno_deprecated",
-                "log_level",
-                "log_context",
-                "debug_trycompile",
-                "debug_output",
-                "debug_find",
-                "trace",
-                "trace_expand",
-                "trace_format",
-                "trace_source",
-                "trace_redirect",
-                "warn_uninitialized",
-                "warn_unused_vars",
-                "no_warn_unused_cli",
-            ),
-        )
+        set_args(configure_opts, _CONFIGURE_OPT_FLAGS)
         cmake_settings["configure_opts"] = configure_opts
-        self.build_opts = set_args([], ("clean_first", "verbose",))
-        self.install_opts = set_args([], ("strip", "verbose",))
+        if self.force:
+            cmake_settings["force"] = True
+        self.build_opts = set_args([], _BUILD_OPT_FLAGS)
+        self.install_opts = set_args([], _INSTALL_OPT_FLAGS)
 
         self.cmake.configure(self.build_base, **cmake_settings)
         self.cmake.save_gitmodules_status(self.dist_dir)
@@ -1,14 +1,38 @@
 import sys
-import multiprocessing as mp
+import mmap
 import re
-from os import environ, path, name, chdir, makedirs, getcwd, walk, remove
+from os import environ, path, name, chdir, makedirs, remove, scandir, stat, fstat, cpu_count
 from shutil import which, rmtree
 import subprocess as sp
-from distutils.version import LooseVersion
+from functools import lru_cache
 
+try:
+    from os import sched_getaffinity
+except ImportError:  # not available on Windows & macOS
+    sched_getaffinity = None
 
+# CMakeCache.txt entry line: <name>:<type>=<value> (matched on the raw file bytes)
+_CACHE_LINE_RE = re.compile(rb"^(?!#|//)([^:\r\n]+):([^=\r\n]+)=([^\r\n]*)", re.MULTILINE)
+
+# cmake --help: generators section and its "[*] <name> = <description>" entries
+_GENERATORS_RE = re.compile(r"Generators[\S\s]*")
+_GEN_BLOCK_RE = re.compile(r"\n([* ]) (\S.+?) = ([\s\S]+?)(?=\n([* ]) \S)")
+_ARCH_RE = re.compile(r'"([^"]+)"')
+_ARCH_TAG_RE = re.compile(r"\s*\[arch\]\s*")
+
+# CMake's true constants for BOOL cache entries (compared uppercased)
+_TRUE_VALUES = frozenset(("1", "ON", "YES", "TRUE", "Y"))
+
+# VsDevCmd.bat -arch/-host_arch matching the running Python
+_VS_ARCH = "amd64" if sys.maxsize > 2 ** 32 else "x86"
+
+# parsed CMakeCache.txt files: {path: ((st_mtime_ns, st_size), entries)}
+_cache_memo = {}
+
+
+@lru_cache(maxsize=None)
 def findexe(cmd):
-    """Find a CMake executable """
+    """Find a CMake executable (memoized per cmd)"""
     if which(cmd) is None and name == "nt":
         cmd += ".exe"
         candidates = [
@@ -16,56 +40,84 @@ def findexe(cmd):
             for var in ("PROGRAMFILES", "PROGRAMFILES(X86)", "APPDATA", "LOCALAPPDATA",)
             if var in environ
         ]
-        cmd = next((path for path in candidates if which(path)), None)
+        # candidates are full paths with .exe: no need for which()'s PATHEXT probing
+        cmd = next((exe for exe in candidates if path.isfile(exe)), None)
     return cmd
 
 
-def run(*args, path=findexe("cmake"), **runargs):
+@lru_cache(maxsize=8)
+def _which(cmd):
+    """memoized shutil.which (validates user-given executable paths once)"""
+    return which(cmd)
+
+
+def run(*args, path=None, **runargs):
     """generic cmake execution with its cli arguments in *args and subprocess.run options in **runargs
     
+    Both output streams are always captured; stderr=True only selects the return value.
+
     Returns: subprocess.CompletedProcess.stdout if stderr=False (default) else a tuple
     (subprocess.CompletedProcess.stdout, subprocess.CompletedProcess.stderr,) 
     """
+    if path is None:
+        path = findexe("cmake")
+    return_stderr = runargs.pop("stderr", False)
     runargs = {
         "stdout": sp.PIPE,
-        "stderr": False,
+        "stderr": sp.PIPE,
         "universal_newlines": True,
         **runargs,
     }
     out = sp.run([path, *args], **runargs)
-    return (out.stdout, out.stderr,) if runargs["stderr"] else out.stdout
+    return (out.stdout, out.stderr,) if return_stderr else out.stdout
 
 
-def validate(cmakePath=findexe("cmake")):
+def validate(cmakePath=None):
     """Raises FileNotFoundError if cmakePath does not specify a valid cmake executable"""
-    min_version = "3.5.0"
+    if cmakePath is None:
+        cmakePath = findexe("cmake")
+    min_version = (3, 5, 0)
     out = sp.run([cmakePath, "--version"], capture_output=True, universal_newlines=True)
-    if not out.check_returncode():
-        FileNotFoundError(
+    if out.returncode:
+        raise FileNotFoundError(
             f"CMake file ({cmakePath}) failed to execute with --version argument."
         )
-    match = re.match(r"cmake version ([\d.]+)", out.stdout)
-    if not match:
-        FileNotFoundError(
+    # first line: "cmake version <major>.<minor>.<patch>[-<suffix>]"
+    prefix = "cmake version "
+    line = out.stdout.split("\n", 1)[0]
+    version = line[len(prefix) :].split("-", 1)[0]
+    try:
+        if not line.startswith(prefix):
+            raise ValueError
+        # pad to 3 parts: "3.5" is 3.5.0
+        cmake_version = (*(int(v) for v in version.split(".")), 0, 0)[:3]
+    except ValueError:
+        raise FileNotFoundError(
             f"CMake file ({cmakePath}) failed to provide valid version information."
-        )
-    cmake_version = LooseVersion(match.group(1))
+        ) from None
     if cmake_version < min_version:
-        raise FileNotFoundError(f"CMake >= {min_version} is required")
+        raise FileNotFoundError(
+            f'CMake >= {".".join(str(v) for v in min_version)} is required'
+        )
 
 
 def configured(buildDir):
     """True if CMake project has been configured"""
-    return path.isfile(path.join(getcwd(), buildDir, "CMakeCache.txt"))
+    return path.isfile(path.join(buildDir, "CMakeCache.txt"))
 
 
 def clear(buildDir):
-    """Clear CMake build directory"""
-    for root, dirs, files in walk(buildDir):
-        for name in files:
-            remove(path.join(root, name))
-        for name in dirs:
-            rmtree(path.join(root, name))
+    """Clear CMake build directory (its contents; a symlinked directory is kept)"""
+    try:
+        entries = list(scandir(buildDir))
+    except FileNotFoundError:
+        makedirs(buildDir)
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            rmtree(entry.path)
+        else:
+            remove(entry.path)
 
 
 def configure(
@@ -73,7 +125,7 @@ def configure(
     build_dir,
     *args,
     build_type="Release",
-    cmakePath=findexe("cmake"),
+    cmakePath=None,
     need_msvc=False,
     **kwargs,
 ):
@@ -93,9 +145,12 @@ def configure(
        build_type str: "Debug", {"Release"}, "RelWithDebInfo" and "MinSizeRel"
        cmakePath str: path of cmake executable
        env dict: A mapping that defines the environment variables for the new process
-       need_msvc bool: True to create a batch file in Windows to make MSVC compiler available to CMake
+       need_msvc bool: True to run cmake in the MSVC developer environment (Windows)
     """
 
+    if cmakePath is None:
+        cmakePath = findexe("cmake")
+
     # build cmake arguments
     args = [
         cmakePath,
@@ -109,19 +164,31 @@ def configure(
     # retrieve env if assigned
     env = kwargs["env"] if "env" in kwargs else None
 
-    # if Windows and G option is specified and its value is "Ninja*", need a BAT file
+    # if Windows and G option is specified and its value is "Ninja*", cmake must run
+    # in the MSVC developer environment (captured once, shared with build & install)
     if need_msvc:
-        # to run Ninja in Windows, cmake must first setup vsvc
-        msvc_path = _getvspath()
-        if not msvc_path:
-            raise FileNotFoundError("Cannot use Ninja because MSVC is not found.")
-        args = [_createNinjaBatch(build_dir, msvc_path, args, env)]
+        env = _msvcEnviron(env)
 
-    sp.run(args, env=env, check=True).check_returncode()
+    sp.run(args, env=env, check=True)
 
 
 def _getWorkerCount():
-    return max(mp.cpu_count() - 1, 1)
+    """Default number of parallel jobs
+
+    CMAKETOOLS_JOBS environment variable if set, else 1 less than the number of
+    usable logical cores (honoring CPU affinity, e.g. taskset/cgroups in CI),
+    capped at 16 so large hosts are not oversubscribed.
+    """
+    jobs = environ.get("CMAKETOOLS_JOBS", "").strip()
+    if jobs:
+        try:
+            return max(int(jobs), 1)
+        except ValueError:
+            raise ValueError(
+                f'CMAKETOOLS_JOBS must be an integer (given "{jobs}")'
+            ) from None
+    n = len(sched_getaffinity(0)) if sched_getaffinity else cpu_count() or 1
+    return max(min(n - 1, 16), 1)
 
 
 def build(
@@ -129,7 +196,7 @@ def build(
     *args,
     build_type=None,
     parallel=None,
-    cmakePath=findexe("cmake"),
+    cmakePath=None,
     **kwargs,
 ):
     """run cmake to generate a project buildsystem
@@ -146,11 +213,15 @@ def build(
     ----------
        build_type str: "Debug", {"Release"}, "RelWithDebInfo" and "MinSizeRel"
        parallel int: The maximum number of concurrent processes to use when building. Default: 1 less than 
-                     the number of available logical cores.
+                     the number of available logical cores (max 16, see _getWorkerCount).
        cmakePath str: path of cmake executable
        env: A mapping that defines the environment variables for the new process
+       need_msvc bool: True to run cmake in the MSVC developer environment (Windows)
     """
 
+    if cmakePath is None:
+        cmakePath = findexe("cmake")
+
     # build cmake arguments
     args = [
         cmakePath,
@@ -166,7 +237,11 @@ def build(
     # retrieve env if assigned
     env = kwargs["env"] if "env" in kwargs else None
 
-    return sp.run(args, env=env).check_returncode()
+    # reuse MSVC environment captured from VsDevCmd.bat (Windows Ninja only)
+    if kwargs.get("need_msvc"):
+        env = _msvcEnviron(env)
+
+    sp.run(args, env=env, check=True)
 
 
 def install(
@@ -174,7 +249,7 @@ def install(
     install_dir,
     *args,
     build_type=None,
-    cmakePath=findexe("cmake"),
+    cmakePath=None,
     **kwargs,
 ):
     """run cmake to install an already-generated project binary tree
@@ -198,8 +273,12 @@ def install(
     ----------
        component str: Only install specified component  
        env: A mapping that defines the environment variables for the new process
+       need_msvc bool: True to run cmake in the MSVC developer environment (Windows)
     """
 
+    if cmakePath is None:
+        cmakePath = findexe("cmake")
+
     # build cmake arguments
     args = [
         cmakePath,
@@ -220,10 +299,22 @@ def install(
     # retrieve env if assigned
     env = kwargs["env"] if "env" in kwargs else None
 
-    return sp.run(args, env=env).check_returncode()
+    # reuse MSVC environment captured from VsDevCmd.bat (Windows Ninja only)
+    if kwargs.get("need_msvc"):
+        env = _msvcEnviron(env)
+
+    sp.run(args, env=env, check=True)
 
 
-def ctest(build_dir, ctestPath=findexe("ctest"), **kwargs):
+# ctest() keyword argument -> ctest cli arguments
+_CTEST_ARGS = {
+    "parallel": lambda value: ("--parallel", str(value)),
+    "build-config": lambda value: ("--build-config", str(value)),
+    "options": tuple,
+}
+
+
+def ctest(build_dir, ctestPath=None, **kwargs):
     """run cmake to generate a project buildsystem
 
     Parameters:
@@ -233,14 +324,17 @@ def ctest(build_dir, ctestPath=findexe("ctest"), **kwargs):
     Keyword Args:
     ----------
        parallel int: The maximum number of concurrent processes to use when building. Default: 1 less than 
-                     the number of available logical cores.
+                     the number of available logical cores (max 16, see _getWorkerCount).
        build-config str: Choose configuration to test.
        options seq(str): Sequence of generic arguments. Include preceding dash(es).
        env: A mapping that defines the environment variables for the new process
     """
 
+    if ctestPath is None:
+        ctestPath = findexe("ctest")
+
     # make sure it's a valid path
-    if not (ctestPath and which(ctestPath)):
+    if not (ctestPath and _which(ctestPath)):
         raise FileNotFoundError("ctest is not found on the local system")
 
     # prune empty entries
@@ -251,66 +345,104 @@ def ctest(build_dir, ctestPath=findexe("ctest"), **kwargs):
         kwargs["parallel"] = _getWorkerCount()
 
     args = [ctestPath]
-    env = None
+    env = kwargs.pop("env", None)
     for key, value in kwargs.items():
-        if key in ("parallel", "build-config"):
-            args.append(f"--{key}")
-            args.append(f"{value}")
-        elif key == "options":
-            for f in value:
-                args.append(f)
-        elif key == "env":
-            env = value
-        else:
-            raise KeyError
+        handler = _CTEST_ARGS.get(key)
+        if handler is None:
+            raise KeyError(f"unknown ctest option: {key}")
+        args.extend(handler(value))
 
-    return sp.run(args, cwd=build_dir, env=env).check_returncode()
+    sp.run(args, cwd=build_dir, env=env, check=True)
 
 
+@lru_cache(maxsize=1)
 def _getvspath():
-    """Use vswhere to obtain VisualStudio path (Windows only)"""
+    """Use vswhere to obtain VisualStudio path (Windows only, memoized)"""
     import vswhere
 
     return vswhere.find_first(latest=True, products=["*"], prop="installationPath")
 
 
-def _createNinjaBatch(buildDir, vsPath, cmakeArgs, env):
-    """Create Windows batch file for Ninja"""
-    if not path.exists(buildDir):
-        makedirs(buildDir)
-    batpath = path.join(buildDir, "cmake_config.bat")
-
-    is_64bits = sys.maxsize > 2 ** 32
-    vsdevcmd_args = [
+def _vsDevCmdArgs(vsPath):
+    """VsDevCmd.bat command line targeting the running Python's architecture"""
+    return [
         f'"{path.join(vsPath,"Common7","Tools","VsDevCmd.bat")}"',
-        f"-arch={'amd64' if is_64bits else 'x86'}",
-        f"-host_arch={'amd64' if is_64bits else 'x86'}",
+        f"-arch={_VS_ARCH}",
+        f"-host_arch={_VS_ARCH}",
     ]
 
-    # put arguments with spaces in double quotes
-    cmakeArgs = [(f'"{arg}"' if re.search(r"\s", arg) else arg) for arg in cmakeArgs]
 
-    batfile = open(batpath, "w")
-    batfile.write(f'CALL {" ".join(vsdevcmd_args)}\n')
-    batfile.write(f'CALL {" ".join(cmakeArgs)}\n')
-    batfile.close()
-    return batpath
+@lru_cache(maxsize=None)
+def _captureVsDevEnv(vsPath):
+    """Run VsDevCmd.bat once and return the variables it sets (Windows only)
+
+    VsDevCmd.bat takes a second or two to run, so its result is memoized per
+    Visual Studio installation and reused by every later cmake invocation.
+    """
+    # cmd /u makes "set" write UTF-16-LE to the pipe (instead of the OEM code page)
+    # so non-ASCII values survive; VsDevCmd.bat's own output is discarded to keep
+    # the stream pure "set" output
+    cmd = f'CALL {" ".join(_vsDevCmdArgs(vsPath))} -no_logo > NUL && set'
+    cmdline = f'cmd.exe /u /s /c "{cmd}"'
+
+    # keep only the variables VsDevCmd.bat added or changed, parsed line by line
+    # as "set" prints them instead of buffering its (100+ KB) output first
+    vsenv = {}
+    with sp.Popen(
+        cmdline, stdout=sp.PIPE, stderr=sp.DEVNULL, encoding="utf-16-le"
+    ) as proc:
+        for line in proc.stdout:
+            key, sep, value = line.rstrip("\n").partition("=")
+            if sep and key and environ.get(key) != value:
+                vsenv[key.upper()] = value
+    if proc.returncode:
+        raise sp.CalledProcessError(proc.returncode, cmdline)
+    return vsenv
+
+
+def _msvcEnviron(env=None):
+    """Overlay the captured MSVC developer environment onto env (Windows only)"""
+    msvc_path = _getvspath()
+    if not msvc_path:
+        raise FileNotFoundError("Cannot use Ninja because MSVC is not found.")
+    return {**(env if env else environ), **_captureVsDevEnv(msvc_path)}
+
+
+def _parse_cache(file):
+    """parse all the entries of a CMakeCache.txt file"""
+    cache_dict = {}
+    with open(file, "rb") as f:
+        if not fstat(f.fileno()).st_size:
+            return cache_dict  # mmap cannot map an empty file
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as cache:
+            for line in _CACHE_LINE_RE.finditer(cache):
+                key, vtype, val = (g.decode() for g in line.groups())
+                value = val.upper() in _TRUE_VALUES if vtype == "BOOL" else val
+                cache_dict[key] = value if value else None
+    return cache_dict
 
 
 def read_cache(build_dir, vars=None):
-    """read CMakeCache.txt file in build_dir"""
+    """read CMakeCache.txt file in build_dir
+    
+    The parsed file is memoized and only re-read if its mtime or size changes.
+    Returns a new dict on every call (None if the cache cannot be read).
+    """
     try:
-        with open(path.join(build_dir, "CMakeCache.txt")) as f:
-            cache = f.read()
-        cache_dict = {}
-        for line in re.finditer(r"(?!#)(.+?):(.+?)=(.*)", cache):
-            v = line[3].upper()
-            value = (
-                v == "TRUE" or v == "ON" or v == "YES" if line[2] == "BOOL" else line[3]
-            )
-            if not vars or line[1] in vars:
-                cache_dict[line[1]] = value if value else None
-        return cache_dict
+        file = path.join(build_dir, "CMakeCache.txt")
+        st = stat(file)
+        key = (st.st_mtime_ns, st.st_size)
+        memo = _cache_memo.get(file)
+        if memo and memo[0] == key:
+            cache_dict = memo[1]
+        else:
+            cache_dict = _parse_cache(file)
+            _cache_memo[file] = (key, cache_dict)
+        return {
+            name: value
+            for name, value in cache_dict.items()
+            if not vars or name in vars
+        }
     except:
         return None
 
@@ -318,11 +450,22 @@ def read_cache(build_dir, vars=None):
 def delete_cache(build_dir):
     """delete CMakeCache.txt file from build_dir"""
     file = path.join(build_dir, "CMakeCache.txt")
+    _cache_memo.pop(file, None)
     if path.exists(file):
         remove(file)
 
 
-def get_generators(cmakePath=findexe("cmake"), as_list=False):
+@lru_cache(maxsize=None)
+def _cmake_help(cmakePath):
+    """memoized output of cmake --help (spawns cmake once per executable)
+    
+    Call _cmake_help.cache_clear() if the cmake executable at cmakePath is
+    replaced mid-session.
+    """
+    return run("--help", path=cmakePath)
+
+
+def get_generators(cmakePath=None, as_list=False):
     """get available CMake generators
     
     Parameter:
@@ -331,20 +474,20 @@ def get_generators(cmakePath=findexe("cmake"), as_list=False):
     
     Returns: str if as_list==False else dict[]
     """
-    match = re.search(r"Generators[\S\s]*", run("--help", path=cmakePath))
+    if cmakePath is None:
+        cmakePath = findexe("cmake")
+    match = _GENERATORS_RE.search(_cmake_help(cmakePath))
     if match:
         result = match[0]
         if as_list:
             result = [
                 {
-                    "name": re.sub(r"\s+", " ", gen[2].strip()),
+                    "name": " ".join(gen[2].split()),
                     "default": gen[1] == "*",
                     "multi-arch": gen[2].endswith("[arch]"),
-                    "desc": re.sub(r"\s+", " ", gen[3].strip()),
+                    "desc": " ".join(gen[3].split()),
                 }
-                for gen in re.finditer(
-                    r"\n([* ]) (\S.+?) = ([\s\S]+?)(?=\n([* ]) \S)", result
-                )
+                for gen in _GEN_BLOCK_RE.finditer(result)
             ]
         else:
             result = "CMake " + result
@@ -354,7 +497,12 @@ def get_generators(cmakePath=findexe("cmake"), as_list=False):
     return result
 
 
-def get_generator_names(cmakePath=findexe("cmake")):
+def show_generators(cmakePath=None):
+    """print available CMake generators"""
+    print(get_generators(cmakePath))
+
+
+def get_generator_names(cmakePath=None):
     """validate generator is among the available CMake generators
     
     Parameter:
@@ -364,14 +512,14 @@ def get_generator_names(cmakePath=findexe("cmake")):
     names = []
     for g in get_generators(cmakePath, True):
         if g["multi-arch"]:
-            for m in re.finditer(r'"([^"]+)"', g["desc"]):
-                names.append(re.sub(r"\[arch\]", m[1], g["name"]))
+            for m in _ARCH_RE.finditer(g["desc"]):
+                names.append(g["name"].replace("[arch]", m[1]))
         else:
             names.append(g["name"])
     return names
 
 
-def generator_changed(generator, build_dir="build", cmakePath=findexe("cmake")):
+def generator_changed(generator, build_dir="build", cmakePath=None):
     """Returns True if given generator configurations are different from cache"""
 
     cfg = read_cache(
@@ -379,17 +527,19 @@ def generator_changed(generator, build_dir="build", cmakePath=findexe("cmake")):
         ["CMAKE_GENERATOR", "CMAKE_GENERATOR_TOOLSET", "CMAKE_GENERATOR_PLATFORM",],
     )
 
-    default = next(g for g in get_generators(cmakePath, True) if g["default"])
-    if default["multi-arch"]:
-        default["name"] = re.sub(r"\s*\[arch\]\s*", "", default["name"])
+    # not configured yet: nothing to compare against (and no need to query cmake)
+    if not cfg:
+        return False
 
-    # selected = generator["generator"] if generator["generator"] else
+    selected = generator["generator"]
+    if not selected:
+        default = next(g for g in get_generators(cmakePath, True) if g["default"])
+        selected = default["name"]
+        if default["multi-arch"]:
+            selected = _ARCH_TAG_RE.sub("", selected)
 
-    return cfg and (
-        (
-            (generator["generator"] if generator["generator"] else default["name"])
-            != cfg["CMAKE_GENERATOR"]
-        )
+    return (
+        selected != cfg["CMAKE_GENERATOR"]
         or generator["toolset"] != cfg["CMAKE_GENERATOR_TOOLSET"]
         or generator["platform"] != cfg["CMAKE_GENERATOR_PLATFORM"]
     )
@@ -398,24 +548,12 @@ def generator_changed(generator, build_dir="build", cmakePath=findexe("cmake")):
 def set_environ_cxxflags(build_dir, **defs):
     """Set CXXFLAGS/CL environmental variable for extra C++ macro definitions"""
 
-    generator = read_cache(build_dir, ["CMAKE_GENERATOR"])["CMAKE_GENERATOR"]
+    cache = read_cache(build_dir, ["CMAKE_GENERATOR"]) or {}
+    generator = cache.get("CMAKE_GENERATOR")
     if not generator:
-        raise RuntimeError("{build_dir}{os.sep}CMakeCache.txt not found.")
+        raise RuntimeError(f'{path.join(build_dir, "CMakeCache.txt")} not found.')
 
     envvar = "CL" if generator.startswith("Visual Studio") else "CXXFLAGS"
-    env = environ.copy()
-    env[envvar] = (
-        " ".join(
-            [
-                f"-D{key}={value}"
-                for key, value in [
-                    (key, f'{value}' if type(value) == str else value,)
-                    for key, value in defs.items()
-                ]
-            ]
-        )
-        + " "
-        + env.get(envvar, "")
-    )
+    flags = " ".join(f"-D{key}={value}" for key, value in defs.items())
 
-    return env
+    return {**environ, envvar: f'{flags} {environ.get(envvar, "")}'}
@@ -1,13 +1,19 @@
-import re
 import configparser as cp
 import subprocess as sp
 import os
 import pathlib
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 gitmodules_status_name = ".gitmodules_status"
 
 
+@lru_cache(maxsize=1)
 def has_submodules():
+    """True if the project (current directory) has .gitmodules (memoized)
+
+    Call has_submodules.cache_clear() after creating or removing .gitmodules.
+    """
     return os.path.isfile(".gitmodules")
 
 
@@ -20,6 +26,21 @@ def get_submodule_status():
     )
 
 
+def iter_submodule_status(status):
+    """Iterate (flag, sha1, path) of each submodule in "git submodule status" output
+
+    Each line reads: <flag><sha1> <path>[ (<describe>)]
+    """
+    for line in status.splitlines():
+        sha1, sep, path = line[1:].partition(" ")
+        if not sep:
+            continue
+        describe = path.rfind(" (")
+        if describe > 0 and path.endswith(")"):
+            path = path[:describe]
+        yield line[0], sha1, path
+
+
 def clone_submodules(status="", excludes=[]):
     """Clone submodules if missing
 
@@ -31,7 +52,9 @@ def clone_submodules(status="", excludes=[]):
         List of submodules to ignore (default: [])
     """
 
-    # if project does not use any submodule, nothing to do
+    # if project does not use any submodule, nothing to do (re-check: .gitmodules or
+    # the working directory may have changed since the last call)
+    has_submodules.cache_clear()
     if not has_submodules():
         return
 
@@ -43,49 +66,99 @@ def clone_submodules(status="", excludes=[]):
     submodules = [
         dict(src=module["url"], dst=module["path"], sha1=None)
         for (name, module) in parser.items()
-        if name is not "DEFAULT"
+        if name != "DEFAULT"
     ]
 
     # if .gitmodules_status is provided, get sha1 hash keys
     if status:
-        for m in re.findall(r".([0-9a-f]{5,40})\s(.+)\s\(.*?\)", status):
-            next(module for module in submodules if m[1] == module["dst"])["sha1"] = m[
-                0
-            ]
+        by_path = {module["dst"]: module for module in submodules}
+        for _, sha1, path in iter_submodule_status(status):
+            if path in by_path:
+                by_path[path]["sha1"] = sha1
+
+    # skip modules in excludes argument
+    excludes = frozenset(excludes)
+    modules = [module for module in submodules if module["dst"] not in excludes]
+
+    # in a git work tree, initialize all missing submodules with a single git call
+    if os.path.exists(".git"):
+        missing = [
+            module["dst"]
+            for module in modules
+            if not os.path.exists(os.path.join(module["dst"], ".git"))
+        ]
+        if missing:
+            print(f'[git] initializing submodules: {", ".join(missing)}...')
+            update_submodules(*missing)
+
+    # HEADs of the checked-out submodules, all from a single git call (empty if the
+    # project is not a git work tree, e.g., an unpacked sdist)
+    heads = {
+        path: sha1
+        for flag, sha1, path in iter_submodule_status(get_submodule_status())
+        if flag != "-"
+    }
 
     # clone only if dst does not exist then checkout specific branch/tag if sha1 is given
-    for module in submodules:
-        # skip modules in excludes argument
-        if module["dst"] in excludes:
-            continue
-
+    # - runs in a worker thread: collect the messages and git output to print later
+    def update(module):
+        log = []
         if os.path.exists(os.path.join(module["dst"], ".git")):
             msg = f'[git] submodule {module["dst"]} is already present.'
+            head = heads.get(module["dst"]) or get_sha1(module["dst"])
         else:
-            print(f'[git] cloning {module["src"]} to {module["dst"]}...')
-            clone(module["src"], module["dst"])
-            msg = "[git] cloning complete."
-
-        if module["sha1"] and module["sha1"] != get_sha1(module["dst"]):
-            print(msg + " Checking out the specified commit...")
-            checkout(module["dst"], module["sha1"])
+            log.append(f'[git] cloning {module["src"]} to {module["dst"]}...')
+            log.append(clone(module["src"], module["dst"], capture=True))
+            msg = f'[git] cloning {module["dst"]} complete.'
+            head = None  # fresh clone is at the default branch
+
+        if module["sha1"] and module["sha1"] != head:
+            log.append(msg + " Checking out the specified commit...")
+            log.append(checkout(module["dst"], module["sha1"], capture=True))
         else:
-            print(msg)
+            log.append(msg)
+        return log
+
+    # clones are network-bound: run them concurrently, but report in submodule order
+    # from this thread (also re-raises any exception from the workers)
+    if modules:
+        with ThreadPoolExecutor(max_workers=min(8, len(modules))) as executor:
+            for log in executor.map(update, modules):
+                print("\n".join(line.rstrip("\n") for line in log if line))
 
 
 def get_sha1(submodule):
-    return rev_parse(submodule, "HEAD")
+    return rev_parse(submodule, "HEAD").strip()
 
 
-def clone(repository, directory, **kw):
+def clone(repository, directory, capture=False, **kw):
+    """git clone; returns its combined output instead of printing it if capture"""
     args = ["git", "clone", repository, directory]
     if not "recurse_submodules" in kw or kw["recurse_submodules"]:
         args.append("--recurse-submodules")
-    sp.run(args)
+    return _run(args, capture)
+
+
+def update_submodules(*paths):
+    """Initialize and check out submodules at the commits recorded in the project"""
+    args = ["git", "submodule", "update", "--init", "--recursive"]
+    if len(paths) > 1:
+        args.append(f"--jobs={min(8, len(paths))}")
+    sp.run((*args, "--", *paths))
 
 
-def checkout(directory, branch):
-    sp.run(("git", "checkout", branch,), cwd=directory)
+def checkout(directory, branch, capture=False):
+    """git checkout; returns its combined output instead of printing it if capture"""
+    return _run(("git", "checkout", branch,), capture, cwd=directory)
+
+
+def _run(args, capture, **kwargs):
+    if not capture:
+        sp.run(args, **kwargs)
+        return None
+    return sp.run(
+        args, stdout=sp.PIPE, stderr=sp.STDOUT, universal_newlines=True, **kwargs
+    ).stdout
 
 
 def rev_parse(directory, *args):
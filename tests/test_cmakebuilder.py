@@ -0,0 +1,127 @@
+import subprocess as sp
+
+import pytest
+
+from cmaketools import CMakeBuilder, cmakebuilder
+
+
+@pytest.fixture
+def configure_runs(monkeypatch, tmp_path):
+    """replace the cmake configure call with a stub that creates CMakeCache.txt
+    and return the list of its recorded calls"""
+
+    monkeypatch.chdir(tmp_path)
+    runs = []
+
+    def configure(root_dir, build_dir, *args, **kwargs):
+        runs.append(args)
+        if "-DFAIL=1" in args:
+            raise sp.CalledProcessError(1, ["cmake", *args])
+        (tmp_path / build_dir / "CMakeCache.txt").write_text("")
+
+    (tmp_path / "build").mkdir()
+    cmakeutil = cmakebuilder.cmakeutil
+    monkeypatch.setattr(cmakeutil, "configure", configure)
+    monkeypatch.setattr(cmakeutil, "generator_changed", lambda *args: False)
+    return runs
+
+
+GENERATOR = dict(generator=None, toolset=None, platform=None)
+
+
+def test_configure_skipped_if_unchanged(configure_runs):
+    builder = CMakeBuilder()
+    builder.configure("build", GENERATOR, configure_opts=["-DFOO=1"])
+    builder.configure("build", GENERATOR, configure_opts=["-DFOO=1"])
+    assert configure_runs == [("-DFOO=1",)]
+    assert builder.build_dir == "build"
+
+
+def test_configure_forced(configure_runs):
+    builder = CMakeBuilder()
+    builder.configure("build", GENERATOR, configure_opts=["-DFOO=1"])
+    builder.configure("build", GENERATOR, configure_opts=["-DFOO=1"], force=True)
+    assert configure_runs == [("-DFOO=1",), ("-DFOO=1",)]
+
+
+def test_configure_rerun_if_changed(configure_runs):
+    builder = CMakeBuilder()
+    builder.configure("build", GENERATOR, configure_opts=["-DFOO=1"])
+    builder.configure("build", GENERATOR, configure_opts=["-DFOO=2"])
+    builder.configure("build", GENERATOR, config="Debug", configure_opts=["-DFOO=2"])
+    assert len(configure_runs) == 3
+
+
+def test_configure_rerun_without_cache(configure_runs, tmp_path):
+    builder = CMakeBuilder()
+    builder.configure("build", GENERATOR, configure_opts=["-DFOO=1"])
+    (tmp_path / "build" / "CMakeCache.txt").unlink()
+    builder.configure("build", GENERATOR, configure_opts=["-DFOO=1"])
+    assert len(configure_runs) == 2
+
+
+def test_configure_failure_discards_hash(configure_runs, tmp_path):
+    builder = CMakeBuilder()
+    builder.configure("build", GENERATOR, configure_opts=["-DFOO=1"])
+    with pytest.raises(sp.CalledProcessError):
+        builder.configure("build", GENERATOR, configure_opts=["-DFAIL=1"])
+    assert not (tmp_path / "build" / cmakebuilder._CONFIG_HASH_FILE).exists()
+
+    # the cache was left behind by the failed run: the original settings must
+    # be configured again instead of being skipped
+    builder.configure("build", GENERATOR, configure_opts=["-DFOO=1"])
+    assert configure_runs == [("-DFOO=1",), ("-DFAIL=1",), ("-DFOO=1",)]
+
+
+@pytest.fixture
+def ext_src(monkeypatch, tmp_path):
+    """src tree with one pybind11 module, one plain CMake dir and an empty file"""
+
+    monkeypatch.chdir(tmp_path)
+    for dir, txt in (
+        ("src/pkg/ext", "pybind11_add_module(café ext.cpp)\n"),
+        ("src/pkg/lib", "add_library(lib lib.cpp)\n"),
+        ("src/pkg/empty", ""),
+    ):
+        (tmp_path / dir).mkdir(parents=True)
+        (tmp_path / dir / "CMakeLists.txt").write_text(txt, encoding="utf-8")
+
+
+def find_ext_names(hint):
+    builder = CMakeBuilder(ext_module_hint=hint)
+    return sorted(ext.name for ext in builder._find_ext_modules_from_hint())
+
+
+def test_find_ext_modules_from_hint(ext_src):
+    assert find_ext_names(r"pybind11_add_module") == ["pkg.ext"]
+
+
+@pytest.mark.parametrize("hint", [r".*pybind11_add_module", r".*?pybind11_add_module"])
+def test_find_ext_modules_from_hint_leading_wildcard(ext_src, hint):
+    with pytest.warns(UserWarning, match="redundant"):
+        assert find_ext_names(hint) == ["pkg.ext"]
+
+
+def test_find_ext_modules_from_hint_str_semantics(ext_src):
+    # hint is a str regex: \w matches non-ASCII letters, (?u) is accepted
+    assert find_ext_names(r"(?u)caf\w") == ["pkg.ext"]
+
+
+def test_find_ext_modules_from_hint_empty_file(ext_src):
+    assert find_ext_names(r"^$") == ["pkg.empty"]
+
+
+def test_find_ext_modules_from_hint_order(ext_src, tmp_path):
+    # files are read in a thread pool: result must follow the directory walk
+    for name in "abcdefghij":
+        dir = tmp_path / "src" / "pkg" / name
+        dir.mkdir()
+        (dir / "CMakeLists.txt").write_text(f"pybind11_add_module({name} m.cpp)\n")
+    builder = CMakeBuilder(ext_module_hint=r"pybind11_add_module")
+    names = [ext.name for ext in builder._find_ext_modules_from_hint()]
+    assert sorted(names) == sorted(["pkg.ext", *("pkg." + name for name in "abcdefghij")])
+    walk = [
+        f.parent.relative_to(tmp_path / "src").as_posix().replace("/", ".")
+        for f in (tmp_path / "src").rglob("**/CMakeLists.txt")
+    ]
+    assert names == [name for name in walk if name in names]
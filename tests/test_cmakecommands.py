@@ -0,0 +1,67 @@
+import os
+
+import pytest
+from setuptools.dist import Distribution
+
+from cmaketools import CMakeBuilder, generate_cmdclass
+
+
+@pytest.fixture
+def configure_settings(monkeypatch, tmp_path):
+    """run build_ext option processing with the given command line arguments and
+    return the keyword arguments passed on to CMakeBuilder.configure()"""
+
+    monkeypatch.chdir(tmp_path)
+    cmake = CMakeBuilder()
+    calls = []
+    monkeypatch.setattr(cmake, "configure", lambda build_dir, **kw: calls.append(kw))
+    monkeypatch.setattr(cmake, "save_gitmodules_status", lambda dst_dir: None)
+
+    def finalize(*args):
+        dist = Distribution({"name": "pkg", "cmdclass": generate_cmdclass(cmake)})
+        dist.script_args = ["build_ext", *args]
+        dist.parse_command_line()
+        dist.get_command_obj("build_ext").ensure_finalized()
+        return calls[-1]
+
+    return finalize
+
+
+@pytest.fixture
+def configure_opts(configure_settings):
+    """configure_opts passed to CMakeBuilder.configure() for the given arguments"""
+    return lambda *args: configure_settings(*args)["configure_opts"]
+
+
+def test_configure_opts_warnings(configure_opts):
+    # warning options are single-dashed
+    assert configure_opts("--Wno-dev", "--Werror=deprecated") == [
+        "-Wno-dev",
+        "-Werror=deprecated",
+    ]
+
+
+def test_configure_opts_long_form(configure_opts):
+    assert configure_opts("--log-level=DEBUG", "--trace") == [
+        "--log-level=DEBUG",
+        "--trace",
+    ]
+
+
+def test_configure_opts_short_form(configure_opts):
+    assert configure_opts("-C", "init.cmake", "-U", "FOO*") == [
+        "-C",
+        "init.cmake",
+        "-U",
+        "FOO*",
+    ]
+
+
+def test_configure_opts_define(configure_opts):
+    define = os.pathsep.join(("FOO=1", "BAR:STRING=a b"))
+    assert configure_opts("-D", define) == ["-DFOO=1", '-DBAR:STRING="a b"']
+
+
+def test_force(configure_settings):
+    assert "force" not in configure_settings()
+    assert configure_settings("--force")["force"] is True
@@ -1,8 +1,276 @@
+import os
+import subprocess as sp
+
 import pytest
-import cmakeutils
 
-def test_hello():
-    hello.say_hello()
+from cmaketools import cmakeutil
+
+
+def fake_version(monkeypatch, stdout, returncode=0):
+    """make cmakeutil see `stdout` as the output of cmake --version"""
+
+    def run(args, **kwargs):
+        return sp.CompletedProcess(args, returncode, stdout, "")
+
+    monkeypatch.setattr(cmakeutil.sp, "run", run)
+
+
+@pytest.mark.parametrize(
+    "stdout",
+    [
+        "cmake version 3.16.3\n\nCMake suite maintained and supported by Kitware",
+        "cmake version 3.5.0\n",
+        "cmake version 3.5\n",
+        "cmake version 3.18.0-rc1\n",
+    ],
+)
+def test_validate(monkeypatch, stdout):
+    fake_version(monkeypatch, stdout)
+    cmakeutil.validate("cmake")
+
+
+@pytest.mark.parametrize(
+    "stdout",
+    ["cmake version 3.4.3\n", "cmake version 2.8\n", "cmake version 3.4.0-rc2\n"],
+)
+def test_validate_old_version(monkeypatch, stdout):
+    fake_version(monkeypatch, stdout)
+    with pytest.raises(FileNotFoundError, match="is required"):
+        cmakeutil.validate("cmake")
+
+
+@pytest.mark.parametrize(
+    "stdout", ["ctest version 3.16.3\n", "cmake version x.y\n", ""],
+)
+def test_validate_bad_version(monkeypatch, stdout):
+    fake_version(monkeypatch, stdout)
+    with pytest.raises(FileNotFoundError, match="valid version information"):
+        cmakeutil.validate("cmake")
+
+
+def test_validate_failed_run(monkeypatch):
+    fake_version(monkeypatch, "cmake version 3.16.3\n", returncode=1)
+    with pytest.raises(FileNotFoundError, match="failed to execute"):
+        cmakeutil.validate("cmake")
+
+
+CMAKE_CACHE = (
+    "# This is the CMakeCache file.\r\n"
+    "# KEY:TYPE=VALUE\r\n"
+    "\r\n"
+    "//Choose the type of build.\r\n"
+    "CMAKE_BUILD_TYPE:STRING=Release\r\n"
+    "//Path to a program.\r\n"
+    "CMAKE_AR:FILEPATH=/usr/bin/ar\r\n"
+    "BUILD_TESTING:BOOL=ON\r\n"
+    "USE_FOO:BOOL=OFF\r\n"
+    "CMAKE_GENERATOR_TOOLSET:INTERNAL=\r\n"
+    "WITH_SPACES:STRING=a b c\r\n"
+)
+
+
+def test_read_cache(tmp_path):
+    (tmp_path / "CMakeCache.txt").write_bytes(CMAKE_CACHE.encode())
+    assert cmakeutil.read_cache(tmp_path) == {
+        "CMAKE_BUILD_TYPE": "Release",
+        "CMAKE_AR": "/usr/bin/ar",
+        "BUILD_TESTING": True,
+        "USE_FOO": None,  # false BOOL and empty values read as None
+        "CMAKE_GENERATOR_TOOLSET": None,
+        "WITH_SPACES": "a b c",
+    }
+    assert cmakeutil.read_cache(tmp_path, ["CMAKE_BUILD_TYPE"]) == {
+        "CMAKE_BUILD_TYPE": "Release"
+    }
+
+
+def test_read_cache_updated(tmp_path):
+    file = tmp_path / "CMakeCache.txt"
+    file.write_text("CMAKE_BUILD_TYPE:STRING=Release\n")
+    assert cmakeutil.read_cache(tmp_path) == {"CMAKE_BUILD_TYPE": "Release"}
+    file.write_text("CMAKE_BUILD_TYPE:STRING=Debug\nFOO:STRING=1\n")
+    assert cmakeutil.read_cache(tmp_path) == {"CMAKE_BUILD_TYPE": "Debug", "FOO": "1"}
+
+
+def test_read_cache_missing(tmp_path):
+    assert cmakeutil.read_cache(tmp_path) is None
+    (tmp_path / "CMakeCache.txt").write_text("")
+    assert cmakeutil.read_cache(tmp_path) == {}
+
+def symlink(src, dst):
+    try:
+        os.symlink(src, dst, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        pytest.skip("symbolic links are not available")
+
+
+def test_clear(tmp_path):
+    build = tmp_path / "build"
+    (build / "sub" / "dir").mkdir(parents=True)
+    (build / "sub" / "dir" / "file").write_text("")
+    (build / "CMakeCache.txt").write_text("")
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "keep").write_text("")
+    symlink(outside, build / "link")
+
+    cmakeutil.clear(build)
+    assert build.is_dir() and not any(build.iterdir())
+    # the symlink is removed, not followed
+    assert (outside / "keep").is_file()
+
+
+def test_clear_symlinked_build_dir(tmp_path):
+    target = tmp_path / "target"
+    target.mkdir()
+    (target / "CMakeCache.txt").write_text("")
+    build = tmp_path / "build"
+    symlink(target, build)
+
+    cmakeutil.clear(build)
+    assert build.is_symlink() and target.is_dir() and not any(target.iterdir())
+
+
+def test_clear_missing(tmp_path):
+    cmakeutil.clear(tmp_path / "build")
+    assert (tmp_path / "build").is_dir()
+
+@pytest.mark.parametrize("func", ["configure", "build", "install"])
+def test_msvc_environment(monkeypatch, func):
+    # all cmake steps share the one captured MSVC developer environment
+    runs = []
+    monkeypatch.setattr(cmakeutil, "_msvcEnviron", lambda env: {"MSVC": "1"})
+    monkeypatch.setattr(
+        cmakeutil.sp, "run", lambda args, **kwargs: runs.append(kwargs["env"])
+    )
+    args = ["build", "dist"] if func == "install" else ["build"]
+    if func == "configure":
+        args.insert(0, ".")
+    getattr(cmakeutil, func)(*args, cmakePath="cmake", need_msvc=True)
+    assert runs == [{"MSVC": "1"}]
+
+@pytest.mark.parametrize("jobs, expected", [("4", 4), (" 8 ", 8), ("0", 1), ("-2", 1)])
+def test_worker_count_environ(monkeypatch, jobs, expected):
+    monkeypatch.setenv("CMAKETOOLS_JOBS", jobs)
+    assert cmakeutil._getWorkerCount() == expected
+
+
+@pytest.mark.parametrize("jobs", ["auto", "1.5"])
+def test_worker_count_environ_invalid(monkeypatch, jobs):
+    monkeypatch.setenv("CMAKETOOLS_JOBS", jobs)
+    with pytest.raises(ValueError, match="CMAKETOOLS_JOBS"):
+        cmakeutil._getWorkerCount()
+
+
+@pytest.mark.parametrize("cores, expected", [(1, 1), (2, 1), (8, 7), (64, 16)])
+def test_worker_count_default(monkeypatch, cores, expected):
+    monkeypatch.delenv("CMAKETOOLS_JOBS", raising=False)
+    monkeypatch.setattr(cmakeutil, "sched_getaffinity", lambda pid: set(range(cores)))
+    assert cmakeutil._getWorkerCount() == expected
+    monkeypatch.setattr(cmakeutil, "sched_getaffinity", None)
+    monkeypatch.setattr(cmakeutil, "cpu_count", lambda: cores)
+    assert cmakeutil._getWorkerCount() == expected
+
+
+def test_worker_count_blank_environ(monkeypatch):
+    monkeypatch.setenv("CMAKETOOLS_JOBS", "")
+    monkeypatch.setattr(cmakeutil, "sched_getaffinity", None)
+    monkeypatch.setattr(cmakeutil, "cpu_count", lambda: None)
+    assert cmakeutil._getWorkerCount() == 1
+
+@pytest.fixture
+def ctest_runs(monkeypatch):
+    """record the command lines of ctest() calls instead of running them"""
+    runs = []
+    monkeypatch.setattr(cmakeutil, "_which", lambda cmd: cmd)
+    monkeypatch.setattr(cmakeutil.sp, "run", lambda args, **kwargs: runs.append(args))
+    return runs
+
+
+def test_ctest_args(ctest_runs):
+    cmakeutil.ctest(
+        "build",
+        "ctest",
+        parallel=4,
+        **{"build-config": "Debug"},
+        options=["-R", "unit"],
+        env={"A": "1"},
+    )
+    assert ctest_runs == [
+        ["ctest", "--parallel", "4", "--build-config", "Debug", "-R", "unit"]
+    ]
+
+
+def test_ctest_default_parallel(monkeypatch, ctest_runs):
+    monkeypatch.setenv("CMAKETOOLS_JOBS", "3")
+    cmakeutil.ctest("build", "ctest", options=None)
+    assert ctest_runs == [["ctest", "--parallel", "3"]]
+
+
+def test_ctest_unknown_option(ctest_runs):
+    with pytest.raises(KeyError, match="unknown ctest option: bogus"):
+        cmakeutil.ctest("build", "ctest", bogus=1)
+    assert ctest_runs == []
+
+
+def test_ctest_handler_error_not_masked(monkeypatch, ctest_runs):
+    def handler(value):
+        raise KeyError("inner")
+
+    monkeypatch.setitem(cmakeutil._CTEST_ARGS, "options", handler)
+    with pytest.raises(KeyError, match="inner"):
+        cmakeutil.ctest("build", "ctest", options=["-N"])
+
+
+def test_ctest_not_found(monkeypatch):
+    monkeypatch.setattr(cmakeutil, "_which", lambda cmd: None)
+    with pytest.raises(FileNotFoundError):
+        cmakeutil.ctest("build", "no-ctest")
+
+GENERATOR_CACHE = (
+    "CMAKE_GENERATOR:INTERNAL=Ninja\n"
+    "CMAKE_GENERATOR_TOOLSET:INTERNAL=\n"
+    "CMAKE_GENERATOR_PLATFORM:INTERNAL=\n"
+)
+
+
+@pytest.fixture
+def generators(monkeypatch):
+    """stub the cmake --help generator list: Ninja is the default"""
+    calls = []
+
+    def get_generators(cmakePath=None, as_list=False):
+        calls.append(cmakePath)
+        return [
+            dict(name="Unix Makefiles", default=False, desc="", **{"multi-arch": False}),
+            dict(name="Ninja", default=True, desc="", **{"multi-arch": False}),
+        ]
+
+    monkeypatch.setattr(cmakeutil, "get_generators", get_generators)
+    return calls
+
+
+def test_generator_changed_not_configured(tmp_path, generators):
+    generator = dict(generator="Ninja", toolset=None, platform=None)
+    assert cmakeutil.generator_changed(generator, tmp_path) is False
+    # no cache to compare against: cmake is not queried
+    assert generators == []
+
+
+@pytest.mark.parametrize(
+    "generator, changed",
+    [
+        (dict(generator="Ninja", toolset=None, platform=None), False),
+        (dict(generator=None, toolset=None, platform=None), False),
+        (dict(generator="Unix Makefiles", toolset=None, platform=None), True),
+        (dict(generator="Ninja", toolset="v142", platform=None), True),
+    ],
+)
+def test_generator_changed(tmp_path, generators, generator, changed):
+    (tmp_path / "CMakeCache.txt").write_text(GENERATOR_CACHE)
+    assert cmakeutil.generator_changed(generator, tmp_path) is changed
+    # the default generator is only looked up if none is given
+    assert len(generators) == (0 if generator["generator"] else 1)
 
 # findexe(cmd)
 # run(*args, path=findexe("cmake"), **runargs)
@@ -0,0 +1,129 @@
+import shutil
+import subprocess as sp
+
+import pytest
+
+from cmaketools import gitutil
+
+
+def test_iter_submodule_status():
+    status = (
+        " c5bc9361aa01c95515ba6b0ecddb7a7bacec5596 extern/pybind11 (v2.5.0)\n"
+        "+0123456789abcdef0123456789abcdef01234567 extern/with space (heads/master)\n"
+        "-abcdef0123456789abcdef0123456789abcdef01 extern/uninitialized\n"
+        "U0000000000000000000000000000000000000000 extern/conflict\n"
+        "\n"
+    )
+    assert list(gitutil.iter_submodule_status(status)) == [
+        (" ", "c5bc9361aa01c95515ba6b0ecddb7a7bacec5596", "extern/pybind11"),
+        ("+", "0123456789abcdef0123456789abcdef01234567", "extern/with space"),
+        ("-", "abcdef0123456789abcdef0123456789abcdef01", "extern/uninitialized"),
+        ("U", "0000000000000000000000000000000000000000", "extern/conflict"),
+    ]
+
+
+def test_iter_submodule_status_empty():
+    assert list(gitutil.iter_submodule_status("")) == []
+
+
+def git(*args, cwd=None):
+    return sp.run(
+        ("git", *args), cwd=cwd, check=True, capture_output=True, universal_newlines=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def repos(monkeypatch, tmp_path):
+    """throwaway repos: "lib" with 2 commits and "top" using lib (at its 1st commit)
+    as submodules extern/lib and extern/other; returns (top url, lib commits)"""
+
+    if not shutil.which("git"):
+        pytest.skip("git is not available")
+    for var in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{var}_NAME", "test")
+        monkeypatch.setenv(f"GIT_{var}_EMAIL", "test@example.com")
+    # allow local file:// submodule clones
+    monkeypatch.setenv("GIT_CONFIG_COUNT", "1")
+    monkeypatch.setenv("GIT_CONFIG_KEY_0", "protocol.file.allow")
+    monkeypatch.setenv("GIT_CONFIG_VALUE_0", "always")
+
+    lib = tmp_path / "lib"
+    git("init", "-q", str(lib))
+    commits = []
+    for msg in ("first", "second"):
+        git("commit", "-q", "--allow-empty", "-m", msg, cwd=lib)
+        commits.append(git("rev-parse", "HEAD", cwd=lib))
+
+    top = tmp_path / "top"
+    git("init", "-q", str(top))
+    for dst in ("extern/lib", "extern/other"):
+        git("submodule", "-q", "add", lib.as_posix(), dst, cwd=top)
+        git("checkout", "-q", commits[0], cwd=top / dst)
+        git("add", dst, cwd=top)
+    git("commit", "-q", "-m", "add submodules", cwd=top)
+    return top, commits
+
+
+def submodule_status(top):
+    # unstripped: each line starts with a status flag (" " if up to date)
+    return sp.run(
+        ("git", "submodule", "status"), cwd=top, capture_output=True, universal_newlines=True
+    ).stdout
+
+
+def head(path):
+    return git("rev-parse", "HEAD", cwd=path)
+
+
+def test_clone_submodules_work_tree(monkeypatch, tmp_path, repos):
+    # fresh clone of the project: submodules are not initialized yet
+    top, commits = repos
+    work = tmp_path / "work"
+    git("clone", "-q", top.as_posix(), str(work))
+    monkeypatch.chdir(work)
+
+    gitutil.clone_submodules()
+    for dst in ("extern/lib", "extern/other"):
+        assert head(work / dst) == commits[0]
+    # initialized as proper submodules of the work tree
+    status = gitutil.iter_submodule_status(submodule_status(work))
+    assert [flag for flag, _, _ in status] == [" ", " "]
+
+
+def test_clone_submodules_sdist(monkeypatch, tmp_path, repos):
+    # unpacked sdist: no .git, only .gitmodules and the pinned status
+    top, commits = repos
+    status = submodule_status(top)
+    sdist = tmp_path / "sdist"
+    sdist.mkdir()
+    shutil.copy(top / ".gitmodules", sdist)
+    monkeypatch.chdir(sdist)
+
+    gitutil.clone_submodules(status)
+    # cloned at the default branch, then checked out at the pinned commit
+    for dst in ("extern/lib", "extern/other"):
+        assert head(sdist / dst) == commits[0]
+
+
+def test_clone_submodules_excludes(monkeypatch, tmp_path, repos):
+    top, commits = repos
+    sdist = tmp_path / "sdist"
+    sdist.mkdir()
+    shutil.copy(top / ".gitmodules", sdist)
+    monkeypatch.chdir(sdist)
+
+    gitutil.clone_submodules(excludes=["extern/other"])
+    assert (sdist / "extern" / "lib" / ".git").exists()
+    assert not (sdist / "extern" / "other").exists()
+
+
+def test_clone_submodules_checkout_pinned(monkeypatch, repos):
+    # a present submodule whose HEAD moved away from the pinned commit
+    top, commits = repos
+    status = submodule_status(top)
+    git("checkout", "-q", commits[1], cwd=top / "extern" / "lib")
+    monkeypatch.chdir(top)
+
+    gitutil.clone_submodules(status)
+    assert head(top / "extern" / "lib") == commits[0]
+    assert head(top / "extern" / "other") == commits[0]